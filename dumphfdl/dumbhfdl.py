@@ -10,27 +10,65 @@ import collections
 import contextlib
 import datetime
 import functools
+import heapq
 import itertools
 import io
 import json
 import logging
 import os
 import pathlib
+import random
 import re
 import signal
+import subprocess
 import sys
-import tempfile
 import threading
 import time
 # third party
 import click        # apt install python3-click or `pip install click` or https://pypi.org/project/click/
 import requests     # apt install python3-requests or `pip install requests` or https://pypi.org/project/requests/
+try:
+    import orjson   # optional, for faster packet parsing. `pip install orjson` or https://pypi.org/project/orjson/
+except ImportError:
+    orjson = None
+try:
+    import uvloop   # optional, a faster event loop. `pip install uvloop` or https://pypi.org/project/uvloop/
+except ImportError:
+    uvloop = None
 
 # all frequencies/bandwidths are in kHz
 import fallback
 
 
-logging.basicConfig(level=logging.DEBUG, format='[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s')
+# How much to log. Debug logging includes a line for every squitter and station update.
+# Set with `--log-level` on command line or environment variable `DUMPHFDL_LOG_LEVEL`
+LOG_LEVEL = 'DEBUG'
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+# an unknown level is left for the `--log-level` option to report, rather than failing before the command line is read.
+ENV_LOG_LEVEL = os.getenv('DUMPHFDL_LOG_LEVEL', LOG_LEVEL).upper()
+
+# orjson's errors subclass json.JSONDecodeError, so error handling is the same either way.
+json_loads = orjson.loads if orjson else json.loads
+
+
+def json_dump(data, path):
+    # pretty-printed, with datetimes rendered as ISO8601 UTC ("Z"). Written straight to the file, without building
+    # an intermediate string: orjson produces the bytes in one go, and `json.dump` streams out its chunks.
+    # orjson can only indent by two spaces, so `json.dump` does the same: the file is laid out the same either way.
+    # The file is written alongside and then swapped in, so a crash mid-write can't leave a truncated file behind.
+    partial = path.with_name(path.name + '.tmp')
+    if orjson:
+        partial.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_UTC_Z))
+    else:
+        with partial.open('w', encoding='utf8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, default=lambda dt: dt.isoformat().replace('+00:00', 'Z'))
+    os.replace(partial, path)
+
+
+logging.basicConfig(
+    level=ENV_LOG_LEVEL if ENV_LOG_LEVEL in LOG_LEVELS else LOG_LEVEL,
+    format='[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s',
+)
 logger = logging.getLogger(sys.argv[0].rsplit('/', 1)[-1].rsplit('.', 1)[0] if __name__ == '__main__' else __name__)
 dumphfdl_logger = logging.getLogger('dumphfdl')
 
@@ -44,16 +82,37 @@ FILTER_FACTOR = 0.9
 
 # The URL to retrieve Ground Station from
 GROUND_STATION_URL = 'https://api.airframes.io/hfdl/ground-stations'
+# How long to wait on a ground station source before giving up on it for this refresh (connect, read seconds)
+REMOTE_TIMEOUT = (3, 7)
+# A source that keeps failing is skipped for 2**failures seconds, up to this long
+REMOTE_BREAKER_LIMIT = 300
+# Remote ground station data retrieved less than this long ago is reused without asking the server again (seconds)
+REMOTE_CACHE_TTL = 300
+# Both of these are shorter than the shortest regular refresh (WATCH_INTERVAL less its jitter), so they only come into
+# play when refreshes come back to back, as they do while a local backup file is being edited. Regular refreshes always
+# revalidate with the server (which is cheap with a 304) and always retry a failing source.
 # How long to cache ground station updates (seconds)
 GS_EXPIRY = 2*3600
+# Minimum time between writes of the ground station cache file (seconds). Packets can arrive several times a second.
+GS_SAVE_INTERVAL = 30
 #
 # How often (seconds) to update the frequency list (and probably restart dumphfdl)
 # Set with `--watch-interval` on command line or environment variable `DUMPHFDL_WATCH_INTERVAL`)
 WATCH_INTERVAL = 600
+# While the frequency list stays the same, the interval doubles up to this many times the watch interval.
+# Each wait is also jittered by this fraction, so that many receivers don't all poll Airframes at the same moment.
+WATCH_BACKOFF_LIMIT = 4
+# the number of doublings it takes to reach WATCH_BACKOFF_LIMIT. Unchanged refreshes aren't counted past this.
+WATCH_BACKOFF_STEPS = (WATCH_BACKOFF_LIMIT - 1).bit_length()
+WATCH_JITTER = 0.2
+# How often to check backup sources that are local files for changes, to refresh early when they do (seconds)
+LOCAL_SOURCE_CHECK_INTERVAL = 10
 #
 # Cooldown between stopping dumphfdl and starting it again. SDRPlay radios need something like this. (seconds)
 # Set with `--sdr-settle` on command line or environment variable `DUMPHFDL_SDR_SETTLE`)
 SDR_SETTLE_TIME = 5
+# How long dumphfdl gets to exit after being asked to on shutdown, before it's killed. (seconds)
+DUMPHFDL_STOP_TIMEOUT = 10
 
 
 # if FILL_OTHER_STATIONS is True, the chooser will add any frequencies from other stations
@@ -82,81 +141,114 @@ SYSTABLE_UPDATES_PATH = f'{DUMB_SHARE_PATH}/hfdl-systable-new.conf'
 # Override with `--log-path` option or the `DUMPHFDL_LOG_PATH` environment variable.
 LOG_PATH = DUMB_SHARE_PATH / "logs"
 
+# Line buffer size for reading packets from dumphfdl. Larger lets bursts of packets be read with fewer wakeups.
+PACKET_BUFFER_LIMIT = 1 << 20
+
+# How long to wait for further frequency changes before restarting dumphfdl (seconds)
+RESTART_DELAY = 0.5
+
+# How much of dumphfdl's stderr to read at a time.
+STDERR_READ_SIZE = 1 << 16
+
+# additional dumphfdl outputs (a JSON list of output specs), passed through verbatim.
+EXTRA_OUTPUTS = tuple(json.loads(os.getenv('DUMPHFDL_OUTPUTS', '[]')))
+
+# dumphfdl stderr messages that need an immediate restart (matched at the start of a line)
+DUMPHFDL_ERRORS = ('Unable to initialize input',)  # , 'Sample buffer overrun')
+
+# dumphfdl stderr messages that only need a restart if they keep happening without packets in between.
+DUMPHFDL_RECOVERABLE_ERRORS = ('readStream failed: TIMEOUT',)
+# all of them in one pattern, so each line is scanned once however many there are.
+RECOVERABLE_ERROR_PATTERN = re.compile('|'.join(re.escape(message) for message in DUMPHFDL_RECOVERABLE_ERRORS))
+RECOVERABLE_ERROR_LIMIT = 10
+
 # 3 station updates per squitter means it takes 6 squitters to fully update. 1 squitter per HFDL frame (32s).
 SQUITTER_FRAME_TIME = 6 * 32 *2  # update only ever other squitter pseudoframe
 
 
 def bandwidth_for_interval(interval):
-    return interval[-1] - interval[0]
+    # intervals are sorted, as pools and the frequency lists they give are. An empty one needs no bandwidth.
+    return interval[-1] - interval[0] if interval else 0
+
+
+def samples_for_interval(interval):
+    # kSamples/sec needed for dumphfdl's filters to cover the interval.
+    return int(bandwidth_for_interval(interval) / FILTER_FACTOR)
 
 
 class GroundStation:
-    last_updated = 0
-    frequencies = []
-    dirty = False
-    temporary = False
-    name = None
-    gsid = "unknown"
-    uplink_packets = 0
-    downlink_packets = 0
+    # updated for every packet heard, so skip the instance dict.
+    __slots__ = (
+        'last_updated', 'frequencies', 'dirty', 'temporary', 'name', 'gsid', 'uplink_packets', 'downlink_packets',
+        'parsed_frequencies', 'stats',
+    )
 
     def __init__(self):
-        try:
-            self.stats = collections.defaultdict(lambda: 0)
-        except Exception as e:
-            logger.error('Ground Station init error', exc_info=e)
-            raise
-
-    def __setattr__(self, name, value):
-        oldval = getattr(self, name, object())
-        super().__setattr__(name, value)
-        if name in ('last_updated', 'frequencies', 'name', 'gsid') and value != oldval:
-            super().__setattr__('dirty', True)
-            super().__setattr__('temporary', False)
+        self.last_updated = 0
+        self.frequencies = []
+        self.dirty = False
+        self.temporary = False
+        self.name = None
+        self.gsid = "unknown"
+        self.uplink_packets = 0
+        self.downlink_packets = 0
+        # (raw frequency entries, sorted frequencies) from the last squitter/hfnpdu seen, as they rarely change.
+        self.parsed_frequencies = ((), [])
+        self.stats = collections.defaultdict(int)
+
+    def set_identity(self, last_updated, gsid, name, frequencies):
+        # the only fields that are saved, so any change here makes the station dirty (and no longer temporary).
+        if (last_updated, gsid, name, frequencies) != (self.last_updated, self.gsid, self.name, self.frequencies):
+            self.dirty = True
+            self.temporary = False
+        self.last_updated = last_updated
+        self.gsid = gsid
+        self.name = name
+        self.frequencies = frequencies
 
     def is_new_pseudoframe(self, timestamp):
         return (self.last_updated // SQUITTER_FRAME_TIME) < (timestamp // SQUITTER_FRAME_TIME)
 
     def update_from_station(self, data):
         if self.is_new_pseudoframe(data.last_updated) or self.temporary:
-            self.last_updated = data.last_updated
-            self.gsid = data.gsid
-            self.name = data.name
-            self.frequencies = data.frequencies
+            self.set_identity(data.last_updated, data.gsid, data.name, data.frequencies)
+            if self.temporary and not data.temporary:
+                # about to be saved for the first time.
+                self.dirty = True
             self.temporary = data.temporary
-            logger.debug(f'station object update {self}')
+            logger.debug('station object update %s', self)
 
     def update_from_airframes(self, data, mark_clean=False, temporary=False):
         # handle data flagged as reference (a negative value indicates a generic offset from "now")
         last_updated = data['last_updated']
         if last_updated < 0:
-            last_updated += datetime.datetime.now(datetime.timezone.utc).timestamp()
+            last_updated += time.time()
         if self.is_new_pseudoframe(last_updated) and (self.temporary or not temporary or not self.last_updated):
-            self.last_updated = last_updated
-            self.gsid = data['id']
-            self.name = data['name']
-            self.frequencies = sorted(data['frequencies']['active'])
+            self.set_identity(last_updated, data['id'], data['name'], sorted(data['frequencies']['active']))
             # logger.debug(f'airframes update for {self}')
             self.temporary = temporary
             if mark_clean or temporary:
                 self.mark_clean()
 
+    def parse_frequencies(self, entries):
+        raw = tuple(entry['freq'] for entry in entries)
+        if raw != self.parsed_frequencies[0]:
+            frequencies = [int(f) for f in raw]
+            frequencies.sort()
+            self.parsed_frequencies = (raw, frequencies)
+        return self.parsed_frequencies[1]
+
     def update_from_squitter(self, data, last_updated):
-        nf = sorted(map(int, (sf['freq'] for sf in data['freqs'])))
+        nf = self.parse_frequencies(data['freqs'])
         if self.temporary or self.is_new_pseudoframe(last_updated) or nf != self.frequencies:
-            self.last_updated = last_updated
-            self.gsid = data['gs']['id']
-            self.name = data['gs']['name']
-            self.frequencies = nf
-            logger.debug(f'squitter update for {self}')
+            self.set_identity(last_updated, data['gs']['id'], data['gs']['name'], nf)
+            logger.debug('squitter update for %s', self)
 
     def update_from_hfnpdu(self, data, last_updated):
         if (self.temporary or not self.last_updated) and data['heard_on_freqs']:  # packets only used to backfill missing stations.
-            self.last_updated = last_updated
-            self.gsid = data['gs']['id']
-            self.name = data['gs']['name']
-            self.frequencies = sorted(map(int, (sf['freq'] for sf in data['heard_on_freqs'])))
-            logger.debug(f'hfnpdu update for {self}')
+            frequencies = self.parse_frequencies(data['heard_on_freqs'])
+            self.set_identity(last_updated, data['gs']['id'], data['gs']['name'], frequencies)
+            logger.debug('hfnpdu update for %s', self)
 
     def rate_uplink_packet(self, packet):
         self.uplink_packets += 1
@@ -176,15 +268,16 @@ class GroundStation:
                 'active': self.frequencies,
             },
             'last_updated': self.last_updated,
-            'when': datetime.datetime.utcfromtimestamp(self.last_updated).isoformat() + 'Z',
+            'when': datetime.datetime.fromtimestamp(self.last_updated, datetime.timezone.utc),
         }
 
     def mark_clean(self):
         self.dirty = False
 
-    def is_valid(self):
-        now = datetime.datetime.now(datetime.timezone.utc).timestamp()
-        horizon = now - GS_EXPIRY
+    def is_valid(self, horizon=None):
+        # callers checking many stations should pass a shared horizon rather than sampling the clock per station.
+        if horizon is None:
+            horizon = time.time() - GS_EXPIRY
         return self.last_updated >= horizon and self.frequencies
 
     def __str__(self):
@@ -201,76 +294,141 @@ class GroundStation:
 
 class GroundStationCache:
     path = None
+    last_saved = 0
+    # set whenever a station is changed or pruned, so saving doesn't need to check every station.
+    unsaved_changes = False
 
     def __init__(self, path=None):
         self.stations_by_id = collections.defaultdict(GroundStation)
         self.stations_by_name = {}
+        # (expiry timestamp, tiebreak, gsid) for each station update, so pruning only visits stations that may have
+        # expired. Entries go stale when a station is updated again; those are skipped when they come up.
+        self.expiry_heap = []
+        self.expiry_sequence = itertools.count()
         self.last = None
-        self.stats = collections.defaultdict(lambda: 0)
+        self.stats = collections.defaultdict(int)
         if (path):
             self.path = pathlib.Path(path)
             self.load()
 
     def load(self):
         if self.path and self.path.exists():
-            s = self.path.read_text()
+            # `json_dump` writes UTF-8 whatever the locale, and both parsers take the bytes as they are.
+            s = self.path.read_bytes()
             if s:
                 self.last = s
-                self.merge_airframes(json.loads(s), mark_clean=True)
+                self.merge_airframes(json_loads(s), mark_clean=True)
 
-    def save(self):
+    def save(self, force=False):
         if self.path:
+            now = time.monotonic()
+            if not force and now - self.last_saved < GS_SAVE_INTERVAL:
+                return
+            if not force and not self.unsaved_changes:
+                return
             current_dict = self.dict()
             if current_dict != self.last:  # very naive
                 self.last = current_dict
-                current = json.dumps(self.dict(), indent=4)
-                current = f'{{ "when" : "{datetime.datetime.now(datetime.timezone.utc).isoformat()}Z", {current[1:]}'
-                self.path.write_text(current)
+                self.last_saved = now
+                json_dump({'when': datetime.datetime.now(datetime.timezone.utc), **current_dict}, self.path)
                 logger.info('saved station cache')
-                map(lambda that: that.mark_clean(), self.stations)
-
-    def update_lookups(self):
-        self.stations_by_name = {gs.name: gs for gs in self.stations if gs.name}
+            self.unsaved_changes = False
+            for station in self.stations_by_id.values():
+                station.mark_clean()
+
+    @contextlib.contextmanager
+    def updating(self, key):
+        station = self[key]
+        before = (station.last_updated, station.frequencies)
+        name = station.name
+        yield station
+        if station.dirty:
+            self.unsaved_changes = True
+        if station.name != name:
+            # names rarely change, so the name lookup is maintained here rather than rebuilt on every prune.
+            if self.stations_by_name.get(name) is station:
+                del self.stations_by_name[name]
+            if station.name:
+                self.stations_by_name[station.name] = station
+        if (station.last_updated, station.frequencies) != before:
+            # a station without frequencies is invalid now, so have it checked at the next prune.
+            expiry = station.last_updated if station.frequencies else 0
+            heapq.heappush(self.expiry_heap, (expiry, next(self.expiry_sequence), station.gsid))
 
     def prune_expired(self):
-        for station in list(self.stations_by_id.values()):
-            if not station.is_valid() and station.gsid in self.stations_by_id:
+        horizon = time.time() - GS_EXPIRY
+        while self.expiry_heap and self.expiry_heap[0][0] < horizon:
+            _, _, gsid = heapq.heappop(self.expiry_heap)
+            station = self.stations_by_id.get(gsid)
+            if station is not None and not station.is_valid(horizon):
                 logger.info(f'pruning {station}')
-                del self.stations_by_id[station.gsid]
-        self.update_lookups()
+                del self.stations_by_id[gsid]
+                if self.stations_by_name.get(station.name) is station:
+                    del self.stations_by_name[station.name]
+                self.unsaved_changes = True
 
     def merge_airframes(self, airframes, is_load=False, mark_clean=False):
         temporary = airframes.get('is_temporary', False)
         for gs in airframes.get('ground_stations', []):
             try:
-                self[gs['id']].update_from_airframes(gs, mark_clean, temporary)
+                with self.updating(gs['id']) as station:
+                    station.update_from_airframes(gs, mark_clean, temporary)
             except KeyError:
                 logger.warning(f'ignoring spurious station `{gs["id"]}`')
-        self.prune_expired()
-        self.save()
+        self.merged()
 
-    def merge_packet(self, hfdl_packet):
+    # squitters and HFNPDUs are subscribed separately, so each packet only walks the branch it matched.
+    def merge_squitter(self, hfdl_packet):
         hfdl = hfdl_packet.packet
         last_updated = hfdl.get('t', {}).get('sec', 0)
-        squitters = hfnpdu = 0
-        for station in hfdl.get('spdu', {}).get('gs_status', []):
-            self[station['gs']['id']].update_from_squitter(station, last_updated)
-            squitters = 1
-        for station in hfdl.get('lpdu', {}).get('hfnpdu', {}).get('freq_data', []):
-            self[station['gs']['id']].update_from_hfnpdu(station, last_updated)
-            hfnpdu = 1
-        self.stats['hfnpdu'] += hfnpdu
-        logger.debug(f'hfnpdu seen: {self.stats["hfnpdu"]}')
-        self.stats['squitter'] += squitters
-        logger.debug(f'squitters seen: {self.stats["squitter"]}')
+        stations = hfdl.get('spdu', {}).get('gs_status', [])
+        for station in stations:
+            with self.updating(station['gs']['id']) as gs:
+                gs.update_from_squitter(station, last_updated)
+        if stations:
+            self.stats['squitter'] += 1
+            logger.debug('squitters seen: %s', self.stats['squitter'])
+        self.merged()
+
+    def merge_hfnpdu(self, hfdl_packet):
+        hfdl = hfdl_packet.packet
+        last_updated = hfdl.get('t', {}).get('sec', 0)
+        stations = hfdl.get('lpdu', {}).get('hfnpdu', {}).get('freq_data', [])
+        for station in stations:
+            with self.updating(station['gs']['id']) as gs:
+                gs.update_from_hfnpdu(station, last_updated)
+        if stations:
+            self.stats['hfnpdu'] += 1
+            logger.debug('hfnpdu seen: %s', self.stats['hfnpdu'])
+        self.merged()
+
+    def merged(self):
+        # pruning only visits stations that may have expired, and saving only happens if anything changed.
         self.prune_expired()
         self.save()
 
     def merge(self, other):
         for gs in other.stations_by_id.values():
-            self.stations_by_id[gs.gsid].update_from_station(gs)
-        self.prune_expired()
-        self.save()
+            with self.updating(gs.gsid) as station:
+                station.update_from_station(gs)
+        self.merged()
+
+    def merge_source(self, airframes):
+        # Equivalent to `merge()`ing a throwaway cache built from `airframes`, without building the cache (or pruning
+        # and saving this one). Callers merging several sources should prune and save once they're done.
+        temporary = airframes.get('is_temporary', False)
+        horizon = time.time() - GS_EXPIRY
+        for gs in airframes.get('ground_stations', []):
+            try:
+                gsid = int(gs['id'])
+            except ValueError:
+                logger.warning(f'ignoring spurious station `{gs["id"]}`')
+                continue
+            incoming = GroundStation()
+            incoming.update_from_airframes(gs, temporary=temporary)
+            if incoming.is_valid(horizon):
+                with self.updating(gsid) as station:
+                    station.update_from_station(incoming)
 
     def dict(self):
         out = list(filter(None, (station.dict() for station in self.stations_by_id.values())))
@@ -283,12 +441,17 @@ class GroundStationCache:
         return self.dict()
 
     def __getitem__(self, key):
+        # packets always carry integer ids, so those skip the conversion (and the exception for names).
+        if isinstance(key, int):
+            return self.stations_by_id[key]
         try:
             return self.stations_by_id[int(key)]
         except ValueError:
             return self.stations_by_name[key]
 
     def __contains__(self, key):
+        if isinstance(key, int):
+            return key in self.stations_by_id
         try:
             return int(key) in self.stations_by_id
         except ValueError:
@@ -307,7 +470,8 @@ class GroundStationCache:
 
     def subscribe_to_packet_watcher(self, packet_watcher):
         packet_watcher.add_subscriber(True, self.rate_packet)
-        packet_watcher.add_in_subscriber(self.merge_packet, '"gs_status"', '"Frequency data"')
+        packet_watcher.add_in_subscriber(self.merge_squitter, '"gs_status"')
+        packet_watcher.add_in_subscriber(self.merge_hfnpdu, '"Frequency data"')
         # add vote gathering tracking later.
 
     def rate_packet(self, packet):
@@ -325,17 +489,28 @@ class GroundStationCache:
 class GroundStationWatcher:
     core_ids = []
     fringe_ids = []
-    skip_fill = False
+    skip_fill = not FILL_OTHER_STATIONS
+    experimental = EXPERIMENTAL
     watch_interval = 600
     _max_sample_size = 20000
     _sample_rates = None
     prefer = 'none'
+    last_pool = None
+    last_pool_signature = None
+    unchanged_refreshes = 0
 
     def __init__(self, ground_station_cache, on_update=None):
         self.ground_station_cache = ground_station_cache
         self.task = None
         self.on_update = on_update
         self.last = []
+        # url -> (conditional request headers, last parsed document, when it was retrieved/revalidated)
+        self.remote_cache = {}
+        # url -> (consecutive failures, skip it until)
+        self.breaker = {}
+        # url -> session, reused across refreshes so keep-alive connections (and their TLS sessions) are kept.
+        # Sources are fetched at the same time on worker threads, and sessions aren't thread-safe, so each has its own.
+        self.sessions = {}
         self.set_backup_list(os.getenv('DUMPHFDL_BACKUP_URL'))
 
     def set_ignore_ranges(self, data):
@@ -345,7 +520,7 @@ class GroundStationWatcher:
             except json.JSONDecodeError:
                 pass
         elif '-' in data:
-            self.ignore_ranges = [(int(s),int(e)) for s, e in (r.split('-') for r in data.split(','))]
+            self.ignore_ranges = [(int(s),int(e)) for s, _, e in (r.partition('-') for r in data.split(','))]
         elif not data:
             self.ignore_ranges = []
         else:
@@ -358,10 +533,46 @@ class GroundStationWatcher:
     async def run(self):
         while True:
             logger.info("refreshing")
-            self.refresh()
-            for i in range(self.watch_interval // 10):
-                logger.debug(f'tick {i}')
-                await asyncio.sleep(10)
+            self.refresh(await self.fetch_remotes())
+            delay = self.next_interval()
+            logger.debug(f'next refresh in {delay:.0f}s')
+            await self.wait_for_refresh(delay)
+
+    async def wait_for_refresh(self, delay):
+        # backup sources that are local files get checked while waiting, so edits to them are picked up right away.
+        versions = self.local_source_versions()
+        if not versions:
+            await asyncio.sleep(delay)
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + delay
+        while (remaining := deadline - loop.time()) > 0:
+            await asyncio.sleep(min(remaining, LOCAL_SOURCE_CHECK_INTERVAL))
+            if self.local_source_versions() != versions:
+                logger.info('local ground station source changed')
+                return
+
+    def local_source_versions(self):
+        versions = {}
+        for url in self.backup_urls:
+            if url.startswith('/'):
+                try:
+                    versions[url] = os.stat(url).st_mtime_ns
+                except OSError:
+                    versions[url] = None
+        return versions
+
+    def next_interval(self):
+        backoff = min(2 ** self.unchanged_refreshes, WATCH_BACKOFF_LIMIT)
+        return self.watch_interval * backoff * random.uniform(1 - WATCH_JITTER, 1 + WATCH_JITTER)
+
+    async def fetch_remotes(self):
+        # requests blocks, so fetch the remote sources together on worker threads while packets keep flowing.
+        loop = asyncio.get_running_loop()
+        # each source is only fetched once, so no two threads ever share a session.
+        urls = list(dict.fromkeys([GROUND_STATION_URL, *self.backup_urls]))
+        documents = await asyncio.gather(*(loop.run_in_executor(None, self.remote, url) for url in urls))
+        return dict(zip(urls, documents))
 
     def remote(self, url):
         data = {}
@@ -369,32 +580,73 @@ class GroundStationWatcher:
             logger.debug(f'retrieving {url}')
             if url.startswith('/'):
                 try:
-                    data = json.loads(pathlib.Path(url).read_bytes())
+                    data = json_loads(pathlib.Path(url).read_bytes())
                 except (json.JSONDecodeError, requests.JSONDecodeError):
                     logger.warning(f'ignoring bad JSON file')
+                except OSError as e:
+                    # it may be in the middle of being replaced. It's checked again at the next refresh.
+                    logger.warning(f'cannot read {url}: {e}. Ignoring.')
             else:
+                conditions, cached, retrieved = self.remote_cache.get(url, ({}, None, 0))
+                if cached is not None and time.monotonic() - retrieved < REMOTE_CACHE_TTL:
+                    logger.debug(f'{url} retrieved recently')
+                    return cached
+                failures, skip_until = self.breaker.get(url, (0, 0))
+                if time.monotonic() < skip_until:
+                    logger.debug(f'{url} failed {failures} times in a row, skipping it for now')
+                    return data
                 try:
-                    response = requests.get(url)
-                except requests.exceptions.ConnectionError as e:
+                    response = self.session_for(url).get(url, headers=conditions, timeout=REMOTE_TIMEOUT)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
                     logger.error("cannot retrieve URL. Ignoring.", exc_info=e)
+                    self.trip_breaker(url, failures)
                 else:
-                    try:
-                        txt = response.text
-                        data = json.loads(txt)
-                    except (json.JSONDecodeError, requests.JSONDecodeError):
-                        logger.warning(f'ignoring bad JSON response')
+                    if response.status_code == 304 and cached is not None:
+                        logger.debug(f'{url} not modified')
+                        self.breaker.pop(url, None)
+                        data = cached
+                        self.remote_cache[url] = (conditions, cached, time.monotonic())
+                    elif not response.ok:
+                        # an error page isn't ground station data, so carry on with what was retrieved before (if any)
+                        logger.error(f'{url} responded {response.status_code}. Ignoring.')
+                        self.trip_breaker(url, failures)
+                        if cached is not None:
+                            data = cached
+                    else:
+                        self.breaker.pop(url, None)
+                        try:
+                            data = json_loads(response.content)
+                        except (json.JSONDecodeError, requests.JSONDecodeError):
+                            logger.warning(f'ignoring bad JSON response')
+                        else:
+                            if response.status_code == 200:
+                                self.cache_remote(url, response, data)
 
         return data
 
-    def parse_airframes(self, data):
-        stations = GroundStationCache()  # in-memory only
-        stations.merge_airframes(data)
-        return stations
+    def session_for(self, url):
+        session = self.sessions.get(url)
+        if session is None:
+            session = self.sessions[url] = requests.Session()
+            session.headers['User-Agent'] = 'dumbhfdl'
+        return session
+
+    def trip_breaker(self, url, failures):
+        failures += 1
+        self.breaker[url] = (failures, time.monotonic() + min(REMOTE_BREAKER_LIMIT, 2 ** failures))
+
+    def cache_remote(self, url, response, data):
+        conditions = {}
+        if response.headers.get('ETag'):
+            conditions['If-None-Match'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            conditions['If-Modified-Since'] = response.headers['Last-Modified']
+        self.remote_cache[url] = (conditions, data, time.monotonic())
 
     def set_backup_list(self, backups):
         if isinstance(backups, list):
             self.backup_urls = backups
-        if backups.startswith('['):
+        elif backups and backups.startswith('['):
             self.backup_urls = json.loads(backups)
         elif backups:
             self.backup_urls = [backups]
@@ -402,14 +654,19 @@ class GroundStationWatcher:
             self.backup_urls = []
         logger.debug(f'backup sources set to {self.backup_urls}')
 
-    def refresh(self):
+    def refresh(self, fetched=None):
+        # `fetched` holds documents already retrieved by `fetch_remotes`, anything else is retrieved here.
+        fetched = fetched or {}
+
+        def get(url):
+            return lambda: fetched[url] if url in fetched else self.remote(url)
+
+        # the cache's own (squitter) data used to be merged back into it first. Serializing every station only to
+        # parse it straight back changed nothing, so the sources start with the remote ones.
         sources = [
-            ('Cached Squitter Data', lambda: self.ground_station_cache.pruned_dict()),
-            ('Airframes Ground Station URL', lambda: self.remote(GROUND_STATION_URL)),
+            ('Airframes Ground Station URL', get(GROUND_STATION_URL)),
         ]
         # ('Backup Ground Station URL', lambda: self.remote(os.getenv('DUMPHFDL_BACKUP_URL'))),
-        def get(url):
-            return lambda: self.remote(url)
         for backup in self.backup_urls:
             sources.append((f'Backup URL: {backup}', get(backup)))
         sources.append(('All Allocated Frequencies', lambda: fallback.ALL_FREQUENCIES))
@@ -418,10 +675,10 @@ class GroundStationWatcher:
 
         logger.info('refreshing ground station data')
         for name, source in sources:
-            ground_station_data = source()
-            parsed = self.parse_airframes(ground_station_data)
-            self.ground_station_cache.merge(parsed)
-        logger.debug(f'Ground station cache:\n{self.ground_station_cache}')
+            self.ground_station_cache.merge_source(source())
+        self.ground_station_cache.prune_expired()
+        self.ground_station_cache.save()
+        logger.debug('Ground station cache:\n%s', self.ground_station_cache)
         if all(self.ground_station_cache.frequencies(core_id) for core_id in self.core_ids):
             return self.choose_best_frequencies()
         else:
@@ -458,15 +715,32 @@ class GroundStationWatcher:
         self._sample_rates = windows
         self.reconcile_samples()
 
+    def pool_signature(self):
+        # everything `best_pool` depends on. Station order matters, as it's the order stations are filled in.
+        stations = tuple((gs.gsid, gs.name, tuple(gs.frequencies)) for gs in self.ground_station_cache.stations)
+        settings = (
+            tuple(self.core_ids), tuple(self.fringe_ids), self.skip_fill, self.prefer, self.maximum_bandwidth,
+            repr(self.ignore_ranges),
+        )
+        return stations, settings
+
     def choose_best_frequencies(self):
-        best_pool = self.best_pool()
+        signature = self.pool_signature()
+        if signature != self.last_pool_signature:
+            self.last_pool = self.best_pool()
+            self.last_pool_signature = signature
+        else:
+            logger.debug('station data unchanged, reusing previous pool')
+        best_pool = self.last_pool
         best_frequencies = list(best_pool)
         if best_frequencies != self.last:
             self.last = best_frequencies
+            self.unchanged_refreshes = 0
             if callable(self.on_update):
                 self.on_update(best_frequencies)
         else:
             logger.info(f"frequencies unchanged {best_frequencies}")
+            self.unchanged_refreshes = min(self.unchanged_refreshes + 1, WATCH_BACKOFF_STEPS)
         return best_frequencies
 
     def create_pool(self, seed=None):
@@ -480,6 +754,7 @@ class GroundStationWatcher:
             - add the frequency if the pool can be expanded to cover a frequency and remain in bandwidth limits.
         2. Step 1 is performed twice, once with ascending frequency lists, and once with descending.
         3. The core pool from (2) with the most frequencies wins (ties resolve in favour of the ascending (low) freqs)
+           If `--prefer` names a pool, only that one is built.
         4. Fringe stations' active frequencies may then be added in a similar manner. (Can be disabled)
         5. Finally, any other stations' active frequencies may then be added. (Can be disabled)
 
@@ -491,21 +766,22 @@ class GroundStationWatcher:
         """
         # build core range
         core_stations = [self.ground_station_cache[n] for n in self.core_ids]
-        low_pool = self.create_pool()
-        low_pool.add_stations(core_stations, pivot=0)
-        low = list(low_pool)
 
-        high_pool = self.create_pool()
-        high_pool.add_stations(core_stations, pivot=-1)
-        high = list(high_pool)
+        def core_pool(name, pivot):
+            pool = self.create_pool()
+            pool.add_stations(core_stations, pivot=pivot)
+            logger.debug(f"{name} pool: {list(pool)}")
+            return pool
+
+        # with a preference, the other pool would only be thrown away, so it isn't built.
         if self.prefer == "high":
-            actual_pool = high_pool
+            actual_pool = core_pool('high', -1)
         elif self.prefer == "low":
-            actual_pool = low_pool
+            actual_pool = core_pool('low', 0)
         else:
+            low_pool = core_pool('low', 0)
+            high_pool = core_pool('high', -1)
             actual_pool = high_pool if len(high_pool) > len(low_pool) else low_pool
-        logger.debug(f"low pool: {low}")
-        logger.debug(f"high pool: {high}")
 
         # Fringe stations don't determine pool range, but fill in frequencies more likely to be heard
         # don't need pivot here.
@@ -513,8 +789,10 @@ class GroundStationWatcher:
 
         # now fill in the others "just in case"
         if not self.skip_fill:
-            # a bit wasteful, but these are all small enough that completely readding everything won't hurt.
-            actual_pool.add_stations(self.ground_station_cache.stations)
+            # core and fringe stations were already offered to the pool. The pool's span only grows, so whatever
+            # didn't fit then still won't, and re-adding them would change nothing.
+            seen = {*self.core_ids, *self.fringe_ids}
+            actual_pool.add_stations(s for s in self.ground_station_cache.stations if s.gsid not in seen)
         return actual_pool
 
     def experimental_pools(self):
@@ -545,7 +823,7 @@ class GroundStationWatcher:
                     seen.append(freqs)
                     yield pool
 
-        if EXPERIMENTAL:
+        if self.experimental:
             middle_pool = experimental_middle_pool()
             logger.info(f'[experimental] middle pool: {list(middle_pool)} (unranked)')
             logger.info('[experimental] iterate-core pools:')
@@ -555,21 +833,43 @@ class GroundStationWatcher:
 
 
 class HFDLPacketInfo:
+    # one of these is made for every packet, so skip the instance dict. Only the fields every packet's subscribers use
+    # are extracted up front; the rest are read from the packet on demand.
+    __slots__ = ('packet', 'frequency', 'src', 'dst')
+
     def __init__(self, packet):
         # Not at all a full extraction of a packet.
         packet = packet.get('hfdl', packet)  # in case it's not unwrapped.
         self.packet = packet
-        self.timestamp = packet['t']['sec']
         self.frequency = packet['freq'] // 1000
-        self.station = packet.get('station')
-        self.bitrate = packet.get('bitrate')
-        self.skew = packet.get('freq_skew')
-        self.frame_slot = packet.get('slot')
-        self.snr = packet['sig_level'] - packet['noise_level']
         app_data = packet.get('spdu', packet.get('lpdu', {}))
         self.src = app_data.get('src', {})
         self.dst = app_data.get('dst', {})
 
+    @property
+    def timestamp(self):
+        return self.packet['t']['sec']
+
+    @property
+    def station(self):
+        return self.packet.get('station')
+
+    @property
+    def bitrate(self):
+        return self.packet.get('bitrate')
+
+    @property
+    def skew(self):
+        return self.packet.get('freq_skew')
+
+    @property
+    def frame_slot(self):
+        return self.packet.get('slot')
+
+    @property
+    def snr(self):
+        return self.packet['sig_level'] - self.packet['noise_level']
+
     @property
     def is_uplink(self):
         return self.src.get('type') == 'Ground station'
@@ -583,23 +883,24 @@ class PacketWatcher:
     task = None
     enabled = False
 
-    def __init__(self, fifo):
-        self.fifo = pathlib.Path(fifo)
+    def __init__(self, pipe):
+        self.pipe = pipe
         self.subscribers = []
 
     def add_in_subscriber(self, callback, *required_text):
+        # lines are published as raw bytes
+        required_text = [needle.encode('utf8') if isinstance(needle, str) else needle for needle in required_text]
+        pattern = re.compile(b'|'.join(re.escape(needle) for needle in required_text))
+
         def _filter(raw, text):
-            for needle in required_text:
-                if needle in raw:
-                    return True
-            return False
+            return pattern.search(raw) is not None
         self.add_subscriber(_filter, callback)
 
     def add_subscriber(self, _filter, callback):
         self.subscribers.append((_filter, callback))
 
     def publish(self, raw):
-        packet = json.loads(raw)
+        packet = json_loads(raw)
         info = HFDLPacketInfo(packet)
         for _filter, callback in self.subscribers:
             if callable(_filter):
@@ -610,41 +911,43 @@ class PacketWatcher:
 
     async def run(self):
         self.enabled = True
-        logger.debug(f'watching for squitters and frequency updates on {self.fifo}')
-        await self.watch_fifo(self.fifo)
+        logger.debug('watching for squitters and frequency updates on %s', self.pipe)
+        try:
+            await self.watch_pipe(self.pipe)
+        finally:
+            self.enabled = False
 
     def start(self):
-        self.task = loop.create_task(self.run())
+        self.task = asyncio.create_task(self.run())
 
     def stop(self):
+        # returns the cancelled task, for callers that need to wait for it to let go of the pipe.
         self.enabled = False
-        if self.task:
-            self.task.cancel()
-            self.task = None
+        task, self.task = self.task, None
+        if task:
+            task.cancel()
+        return task
 
-    async def watch_fifo(self, fifo):
+    async def watch_pipe(self, pipe):
         try:
-            while self.enabled and not fifo.exists():
-                logger.info(f'waiting for fifo {fifo}')
-                await asyncio.sleep(1)
-            reader = asyncio.StreamReader()
+            reader = asyncio.StreamReader(limit=PACKET_BUFFER_LIMIT)
             protocol = asyncio.StreamReaderProtocol(reader)
-            with open(fifo) as pipe:
+            transport, _ = await asyncio.get_running_loop().connect_read_pipe(lambda: protocol, pipe)
+            with contextlib.closing(transport):
                 try:
-                    await loop.connect_read_pipe(lambda: protocol, pipe)
                     async for data in reader:
                         await asyncio.sleep(0)
                         if not self.enabled:
                             break
-                        line = data.decode('utf8')
-                        if line:
-                            self.publish(line)
+                        if data:
+                            # the JSON parsers take bytes directly, so there's no need to decode first.
+                            self.publish(data)
                 except asyncio.CancelledError:
                     logger.info('packet watcher cancelled')
                     raise
                 logger.info('packet watcher completed')
         except Exception as e:
-            logger.error('watching fifo errored out', exc_info=e)
+            logger.error('watching packet pipe errored out', exc_info=e)
             sys.exit(1)
 
     def default_update(self, update):
@@ -667,51 +970,78 @@ def balancing_iter(sources, targets=None, pivot=None):
         # source_pivot = 0
         pivot_freq = sources[0]
     # ordered by distance. This is generally fair; it favours same and near band.
-    return sorted(sources, key=lambda x: abs(x - pivot_freq))
+    # distances are computed once and sorted by index (an argsort), so no Python-level key function runs per compare.
+    distances = [abs(x - pivot_freq) for x in sources]
+    return [sources[ix] for ix in sorted(range(len(sources)), key=distances.__getitem__)]
 
 
 def ordered_by_distance(data, origin):
     return
 
 
+def merge_intervals(intervals):
+    # collapse (possibly overlapping) inclusive intervals into sorted, disjoint start and end lists for bisecting.
+    starts, ends = [], []
+    for start, end in sorted(intervals):
+        if ends and start <= ends[-1]:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
 class FrequencyPool:
     def __init__(self, seed=None, ignored_ranges=None, maximum_bandwidth=None):
-        self.frequencies = list(seed) if seed else []
+        self.frequencies = sorted(set(seed)) if seed else []
+        # membership is checked for every candidate, so keep a set alongside the sorted list.
+        self._frequency_set = set(self.frequencies)
         self.ignored_ranges = ignored_ranges or []
+        self._ignored_starts, self._ignored_ends = merge_intervals(self.ignored_ranges)
         self.maximum_bandwidth = maximum_bandwidth or 2000
-        self.filters = [
-            self.filter_none,
-            self.filter_duplicates,
-            self.filter_ignored_ranges,
-            self.filter_bandwidth,
-        ]
 
     def add(self, frequency):
-        for filter in self.filters:
-            if not filter(frequency):
-                break
-        else:
-            bisect.insort(self.frequencies, frequency)
-        return frequency in self.frequencies
+        self.add_many((frequency,))
+        return frequency in self._frequency_set
+
+    def add_many(self, frequencies):
+        # the duplicate and ignored range checks don't depend on the pool's current span, so the whole batch is
+        # screened in one pass. Only the bandwidth check depends on what was added before it and must run in order.
+        added = self._frequency_set
+        candidates = [f for f in frequencies if f is not None and f not in added and self.filter_ignored_ranges(f)]
+        # track the span as we go and sort once at the end, rather than inserting each frequency into the list.
+        low, high = (self.frequencies[0], self.frequencies[-1]) if self.frequencies else (None, None)
+        accepted = []
+        for frequency in candidates:
+            if frequency in added:
+                continue
+            if low is None:
+                low = high = frequency
+            elif frequency < low:
+                if high - frequency >= self.maximum_bandwidth:
+                    continue
+                low = frequency
+            elif frequency > high:
+                if frequency - low >= self.maximum_bandwidth:
+                    continue
+                high = frequency
+            accepted.append(frequency)
+            added.add(frequency)
+        if accepted:
+            self.frequencies.extend(accepted)
+            self.frequencies.sort()
 
     def extend(self, frequencies, pivot=None):
-        for frequency in balancing_iter(frequencies, self.frequencies, pivot):
-            self.add(frequency)
-
-    def filter_none(self, frequency):
-        return frequency is not None
-
-    def filter_duplicates(self, frequency):
-        return frequency not in self.frequencies
+        if self.frequencies:
+            # the ordering pivots on the pool, so frequencies it already has can be dropped before ordering the rest.
+            frequencies = [f for f in frequencies if f not in self._frequency_set]
+            if not frequencies:
+                return
+        self.add_many(balancing_iter(frequencies, self.frequencies, pivot))
 
     def filter_ignored_ranges(self, frequency):
-        for interval_start, interval_end in self.ignored_ranges:
-            if interval_start <= frequency <= interval_end:
-                return False
-        return True
-
-    def filter_bandwidth(self, frequency):
-        return self.can_cover_bandwidth(frequency, self.frequencies)
+        ix = bisect.bisect_right(self._ignored_starts, frequency)
+        return not ix or frequency > self._ignored_ends[ix - 1]
 
     def __iter__(self):
         yield from self.frequencies
@@ -721,18 +1051,18 @@ class FrequencyPool:
 
     def add_stations(self, stations, pivot=None):
         for station in stations:
-            self.extend(station.frequencies, pivot)
-
-    def can_cover_bandwidth(self, frequency, others):
-        return (
-                not others
-                or others[0] <= frequency <= others[-1]
-                or (others[0] > frequency and others[-1] - frequency < self.maximum_bandwidth)
-                or (others[-1] < frequency and frequency - others[0] < self.maximum_bandwidth)
-            )
+            frequencies = station.frequencies
+            if self.frequencies and frequencies:
+                # station frequencies are sorted, so one lying wholly out of the pool's reach can be skipped outright.
+                if (frequencies[-1] <= self.frequencies[-1] - self.maximum_bandwidth or
+                        frequencies[0] >= self.frequencies[0] + self.maximum_bandwidth):
+                    continue
+            self.extend(frequencies, pivot)
 
 
+@functools.lru_cache(maxsize=32)
 def sample_rate_for(sample_size, sample_rates):
+    # `sample_rates` must be a sorted tuple (as `--sample-rates` provides) so results can be cached per restart.
     sample_size *= 1000
     if not sample_rates:
         return sample_size
@@ -744,14 +1074,16 @@ def sample_rate_for(sample_size, sample_rates):
 
 
 @contextlib.contextmanager
-def temp_fifo():
-    with tempfile.TemporaryDirectory() as dirname:
-        fifo = pathlib.Path(f'{dirname}/dumphfdl.pipe')
-        os.mkfifo(fifo)
-        yield fifo
-        logger.debug('fifo done')
-        # polite to unlink, but likely not strictly necessary.
-        fifo.unlink()
+def packet_pipe():
+    # An anonymous pipe for dumphfdl's JSON packet output, so no FIFO needs to be made on disk for each restart.
+    # dumphfdl inherits the write end and opens it as `/dev/fd/N`.
+    read_fd, write_fd = os.pipe()
+    with open(read_fd, 'rb') as pipe:
+        try:
+            yield pipe, write_fd
+        finally:
+            os.close(write_fd)
+            logger.debug('packet pipe done')
 
 
 class HFDLListener:
@@ -764,146 +1096,239 @@ class HFDLListener:
     sample_rates = None
     killed = False
     dumphfdl_task = None
+    stderr_task = None
     process = None
     packet_watcher = None
     recoverable_error_count = 0
+    frequencies = None
+    running_frequencies = None
+    pending_restart = None
+    # when the last dumphfdl exited (monotonic), as the SDR only needs to settle after it's been released.
+    last_exited = None
+    # options passed straight through to dumphfdl, if set.
+    opt_map = (
+        ('device_settings', '--device-settings'),
+        ('soapysdr', '--soapysdr'),
+        ('gain_elements', '--gain-elements'),
+        ('gain', '--gain'),
+        ('antenna', '--antenna'),
+        ('system_table', '--system-table'),
+        ('system_table_save', '--system-table-save'),
+        ('station_id', '--station-id'),
+        ('freq_offset', '--freq-offset'),
+        ('freq_correction', '--freq-correction'),
+    )
 
     def __init__(self, ground_station_cache, sample_rates, **dumphfdl_opts):
         self.ground_station_cache = ground_station_cache
         self.sample_rates = sample_rates
         self.dumphfdl_opts = dumphfdl_opts
+        # these don't change between restarts, so only format them once.
+        self.passthrough_args = tuple(
+            (to_opt, str(dumphfdl_opts[from_opt]))
+            for from_opt, to_opt in self.opt_map
+            if dumphfdl_opts.get(from_opt, None) is not None
+        )
+        self.station_id = dumphfdl_opts.get('station_id', None)
 
     def dumphfdl_commandline(self, frequencies):
-        sample_rate = sample_rate_for(int(bandwidth_for_interval(frequencies) / FILTER_FACTOR), self.sample_rates)
-        dump_cmd = [
-            'dumphfdl',
-            '--sample-rate', str(sample_rate),
-        ]
-        opt_map = [
-            ('device_settings', 'device-settings'),
-            ('soapysdr', 'soapysdr'),
-            ('gain_elements', 'gain-elements'),
-            ('gain', 'gain'),
-            ('antenna', 'antenna'),
-            ('system_table', 'system-table'),
-            ('system_table_save', 'system-table-save'),
-            ('station_id', 'station-id'),
-            ('freq_offset', 'freq-offset'),
-            ('freq_correction', 'freq-correction'),
-        ]
-        for from_opt, to_opt in opt_map:
-            value = self.dumphfdl_opts.get(from_opt, None)
-            if value is not None:
-                dump_cmd.extend([f'--{to_opt}', str(value)])
+        sample_rate = sample_rate_for(samples_for_interval(frequencies), self.sample_rates)
+        # gathered as argument groups, then flattened once.
+        parts = [('dumphfdl', '--sample-rate', str(sample_rate))]
+        parts.extend(self.passthrough_args)
         if not self.quiet:
-            dump_cmd.extend(['--output', 'decoded:text:file:path=/dev/stdout',])
+            parts.append(('--output', 'decoded:text:file:path=/dev/stdout'))
         if self.statsd_server:
-            dump_cmd.extend([
-                '--statsd', self.statsd_server,
-                '--noise-floor-stats-interval', '30',
-            ])
+            parts.append(('--statsd', self.statsd_server, '--noise-floor-stats-interval', '30'))
         if self.acars_hub:
-            host, port = self.acars_hub.split(':')
-            dump_cmd.extend(['--output', f'decoded:json:tcp:address={host},port={port}'])
-        elif self.dumphfdl_opts.get('station_id') and not self.dumphfdl_opts.get('station_id').startswith('*'):
-            dump_cmd.extend(['--output', 'decoded:json:tcp:address=feed.airframes.io,port=5556',])
+            host, _, port = self.acars_hub.rpartition(':')
+            parts.append(('--output', f'decoded:json:tcp:address={host},port={port}'))
+        elif self.station_id and not self.station_id.startswith('*'):
+            parts.append(('--output', 'decoded:json:tcp:address=feed.airframes.io,port=5556'))
         if self.log_path:
-            dump_cmd.extend(['--output', f'decoded:json:file:path={self.log_path}/hfdl.json.log,rotate=daily',])
+            parts.append(('--output', f'decoded:json:file:path={self.log_path}/hfdl.json.log,rotate=daily'))
         # special pipe for ground_station_updater.
-        dump_cmd.extend(['--output', f'decoded:json:file:path={self.fifo}'])
-        for output in json.loads(os.getenv('DUMPHFDL_OUTPUTS', '[]')):
-            dump_cmd.extend(['--output', output])
-        dump_cmd += [str(f) for f in frequencies]
+        parts.append(('--output', f'decoded:json:file:path=/dev/fd/{self.packet_fd}'))
+        for output in EXTRA_OUTPUTS:
+            parts.append(('--output', output))
+        parts.append(map(str, frequencies))
+        dump_cmd = list(itertools.chain.from_iterable(parts))
         return dump_cmd
 
     def listen(self, frequencies):
+        if self.dumphfdl_task and frequencies == self.frequencies:
+            logger.debug('frequencies unchanged, not restarting dumphfdl')
+            return
         self.frequencies = frequencies
+        if self.pending_restart:
+            self.pending_restart.cancel()
         if self.dumphfdl_task:
-            self.terminate()
+            # updates arriving in quick succession are coalesced into a single restart.
+            self.pending_restart = asyncio.get_running_loop().call_later(RESTART_DELAY, self.restart)
         else:
-            self.dumphfdl_task = loop.create_task(self.run())
+            self.dumphfdl_task = asyncio.create_task(self.run())
+
+    def restart(self):
+        self.pending_restart = None
+        # dumphfdl may have been (re)started with the latest frequencies while this was pending.
+        if self.process and self.running_frequencies != self.frequencies:
+            self.terminate()
 
     async def run(self):
         try:
             while not self.killed:
-                with temp_fifo() as fifo:
-                    logger.debug(f'with fifo {fifo}')
-                    self.fifo = fifo
+                with packet_pipe() as (pipe, packet_fd):
+                    logger.debug('with packet pipe %s', pipe)
+                    self.packet_fd = packet_fd
                     if self.packet_watcher:
                         logger.debug('cleaning up old packet watcher')
                         self.packet_watcher.stop()
-                    logger.info('giving SDR a chance to settle')
-                    await asyncio.sleep(self.sdr_settle)
+                    if self.last_exited is not None:
+                        settle = self.sdr_settle - (time.monotonic() - self.last_exited)
+                        if settle > 0:
+                            logger.info('giving SDR a chance to settle')
+                            await asyncio.sleep(settle)
                     logger.info(f'gathering options for {self.frequencies}')
                     cmd = self.dumphfdl_commandline(self.frequencies)
+                    self.running_frequencies = self.frequencies
                     logger.info('starting dumphfdl')
-                    logger.debug(f'$ `{" ".join(cmd)}`')
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug('$ `%s`', ' '.join(cmd))
                     self.recoverable_error_count = 0
-                    self.process = await asyncio.create_subprocess_exec(*cmd, stderr=asyncio.subprocess.PIPE)
-                    logger.debug(f'process started {self.process}')
+                    self.process, stderr = await self.spawn(cmd, packet_fd)
+                    logger.debug('process started %s', self.process)
+                    if self.running_frequencies != self.frequencies and not self.pending_restart:
+                        # the frequencies changed while it was starting, and the restart for them had nothing to stop.
+                        self.terminate()
                     logger.info('starting packet watcher')
-                    self.packet_watcher = PacketWatcher(fifo)
+                    self.packet_watcher = PacketWatcher(pipe)
                     self.packet_watcher.add_subscriber(True, self.reset_recoverable_error_count)
                     self.ground_station_cache.subscribe_to_packet_watcher(self.packet_watcher)
                     self.packet_watcher.start()
 
                     try:
                         logger.info(f'starting error watcher')
-                        loop.create_task(self.watch_stderr(self.process.stderr))
-                        await self.process.wait()
+                        self.stderr_task = asyncio.create_task(self.watch_stderr(stderr))
+                        await asyncio.get_running_loop().run_in_executor(None, self.process.wait)
                     except Exception as e:
                         logger.error('Process aborted.', exc_info=e)
                         sys.exit(1)
 
                     logger.info('dumphfdl process finished')
+                    self.last_exited = time.monotonic()
                     self.process = None
-                    self.packet_watcher.stop()
+                    # the watcher's transport must be gone before the pipe closes, or it could outlive it (and
+                    # unregister a new pipe that reuses the file descriptor).
+                    stopping = self.packet_watcher.stop()
+                    if stopping:
+                        await asyncio.wait((stopping,))
                 logger.debug('resources freed')
+        except asyncio.CancelledError:
+            # the event loop is shutting down, and won't until the executor waiting on dumphfdl returns.
+            self.stop()
+            raise
         except Exception as e:
             logger.error('dumphfdl Listener encountered an error', exc_info=e)
             sys.exit(1)
         logger.debug('dumphfdl run completed')
 
+    async def spawn(self, cmd, packet_fd):
+        # fork/exec happens synchronously even with `asyncio.create_subprocess_exec`, and can be slow while the SDR
+        # is being reopened, so it's done on a worker thread to keep the packet reader and refresh timer running.
+        loop = asyncio.get_running_loop()
+        spawning = loop.run_in_executor(None, functools.partial(
+            subprocess.Popen, cmd, stderr=subprocess.PIPE, pass_fds=(packet_fd,)
+        ))
+        try:
+            process = await asyncio.shield(spawning)
+        except asyncio.CancelledError:
+            # the worker thread starts dumphfdl regardless. Keep hold of it so it's stopped along with the listener,
+            # rather than left running on its own (and holding the SDR).
+            self.process = await spawning
+            raise
+        stderr = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(stderr), process.stderr)
+        return process, stderr
+
     def terminate(self):
         if self.process:
             logger.info(f'stopping dumphfdl')
             self.process.terminate()
         else:
-            logger.debugger('no process, cannot terminate')
+            logger.debug('no process, cannot terminate')
+
+    def stop(self):
+        # ask dumphfdl to exit (so it can flush its outputs and release the SDR), and don't start it again.
+        # `wait_closed` kills it if it doesn't.
+        self.killed = True
+        self.terminate()
 
     def kill(self):
+        self.killed = True
         if self.process:
             logger.warning('killing dumphfdl')
-            self.killed = True
             self.process.kill()
-            self.process = None
         else:
             logger.debug('no process, cannot kill')
 
+    async def wait_closed(self):
+        # after `stop()`, wait for dumphfdl to exit, and the run loop and the stderr watcher to wind down, rather than
+        # abandoning them. dumphfdl is only killed if it's still running after DUMPHFDL_STOP_TIMEOUT.
+        if self.pending_restart:
+            self.pending_restart.cancel()
+        if self.dumphfdl_task and not self.process:
+            # still settling or spawning, so there's nothing to wait on. A spawn in progress still leaves its process
+            # behind to be stopped, so let the task see that through.
+            self.dumphfdl_task.cancel()
+            await asyncio.wait((self.dumphfdl_task,))
+        process = self.process
+        if process:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, process.wait, DUMPHFDL_STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                self.kill()
+        tasks = [task for task in (self.dumphfdl_task, self.stderr_task) if task]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
     def reset_recoverable_error_count(self, _):
         self.recoverable_error_count = 0
 
     async def watch_stderr(self, stream):
-        errors = ['^Unable to initialize input']  # , '^Sample buffer overrun']
-        recoverable = ['readStream failed: TIMEOUT']
-        async for data in stream:
-            line = data.decode('utf8').rstrip()
-            dumphfdl_logger.info(line)
-            if any(re.search(pattern, line) for pattern in errors):
-                logger.warning(f'encountered error: "{line}". Restarting {self.process}')
-                # force restart
-                self.terminate()
+        # read whatever is available and split it into lines ourselves, rather than waking up for every line.
+        # lines are split on raw bytes, so multi-byte characters are never cut in half; undecodable ones are replaced.
+        pending = b''
+        watching = True
+        while watching:
+            chunk = await stream.read(STDERR_READ_SIZE)
+            if not chunk:
+                if pending:
+                    self.check_stderr(pending.decode('utf8', 'replace').rstrip('\r\n'))
                 break
-            if any(re.search(pattern, line) for pattern in recoverable):
-                self.recoverable_error_count += 1
-                if self.recoverable_error_count > 10:
-                    logger.warning(f'received too many recoverable errors `{line}`. Restarting')
-                    self.terminate()
+            *lines, pending = (pending + chunk).split(b'\n')
+            for data in lines:
+                watching = self.check_stderr(data.decode('utf8', 'replace').rstrip('\r\n'))
+                if not watching:
                     break
-            if not self.process:
-                break
-            await asyncio.sleep(0)
-        logger.info(f'finished watching {stream}')
+        logger.info('finished watching %s', stream)
+
+    def check_stderr(self, line):
+        # returns whether to keep watching
+        dumphfdl_logger.info(line)
+        if line.startswith(DUMPHFDL_ERRORS):
+            logger.warning(f'encountered error: "{line}". Restarting {self.process}')
+            # force restart
+            self.terminate()
+            return False
+        if RECOVERABLE_ERROR_PATTERN.search(line):
+            self.recoverable_error_count += 1
+            if self.recoverable_error_count > RECOVERABLE_ERROR_LIMIT:
+                logger.warning(f'received too many recoverable errors `{line}`. Restarting')
+                self.terminate()
+                return False
+        return self.process is not None
+
+
+STATION_SEPARATORS = str.maketrans('+;', ',,')
 
 
 def split_stations(stations):
@@ -916,30 +1341,44 @@ def split_stations(stations):
             raw_ids = json.loads(stations)
         except json.JSONDecodeError:
             pass
-    elif '+' in stations or ';' in stations:
-        raw_ids = re.split('[+;]', stations)
-    raw_ids = stations.split(',')
-    ids = []
-    for x in raw_ids:
-        try:
-            ids.append(int(x))
-        except ValueError:
-            pass
+    else:
+        # '+' and ';' are accepted as separators too.
+        raw_ids = stations.translate(STATION_SEPARATORS).split(',')
+    # anything that isn't a number is skipped.
+    ids = [int(x) for x in raw_ids if isinstance(x, int) or str(x).strip().isdigit()]
     if len(ids) == 2 and all(not isinstance(x, int) for x in ids):
         # it could still be a station name, not an id.
         return stations
     return ids
 
 
+def parse_sample_rates(ctx, param, value):
+    # click callback, so `run` and `scan` both get the sorted rates. A tuple, so they can be shared and cached.
+    try:
+        return tuple(sorted(int(x) for x in value.split(',') if x))
+    except ValueError:
+        raise click.BadParameter(f'expected comma-separated sample rates, not `{value}`')
+
+
+def parse_acars_hub(ctx, param, value):
+    # click callback. dumphfdl needs both halves of `host:port`, so a bare host is turned away here.
+    if value and ':' not in value:
+        raise click.BadParameter(f'expected host:port, not `{value}`')
+    return value
+
+
 def common_params(func):
-    @click.option('--core-ids', default=os.getenv('DUMPHFDL_CORE_IDS', []))
-    @click.option('--fringe-ids', default=os.getenv('DUMPHFDL_FRINGE_IDS', []))
+    @click.option('--core-ids', default=os.getenv('DUMPHFDL_CORE_IDS', ''))
+    @click.option('--fringe-ids', default=os.getenv('DUMPHFDL_FRINGE_IDS', ''))
     @click.option('--skip-fill', is_flag=True)
     @click.option('--max-samples', type=int, default=os.getenv('DUMPHFDL_MAX_SAMPLES', MAXIMUM_SAMPLE_SIZE))
-    @click.option('--ignore-ranges', default=os.getenv('DUMPHFDL_IGNORE_RANGES', []))
+    @click.option('--ignore-ranges', default=os.getenv('DUMPHFDL_IGNORE_RANGES', ''))
     @click.option('--prefer', help='pool to prefer ("high", "low", or "none")', default=os.getenv('DUMPHFDL_PREFERENCE', 'none'))
     @click.option('--gs-cache', help='Airframes Station Data path', default=os.getenv('DUMPHFDL_AIRFRAMES_CACHE'))
-    @click.option('--sample-rates', help='the sample sizes supported by your radio', default=os.getenv('DUMPHFDL_SAMPLE_RATES', ''))
+    @click.option(
+        '--sample-rates', help='the sample sizes supported by your radio', callback=parse_sample_rates,
+        default=os.getenv('DUMPHFDL_SAMPLE_RATES', '')
+    )
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         return func(*args, **kwargs)
@@ -947,10 +1386,18 @@ def common_params(func):
 
 
 @click.group(invoke_without_command=True)
+@click.option(
+    '--log-level', type=click.Choice(LOG_LEVELS, case_sensitive=False),
+    default=ENV_LOG_LEVEL
+)
 @click.pass_context
-def main(ctx):
+def main(ctx, log_level):
+    logging.getLogger().setLevel(log_level.upper())
     if not ctx.invoked_subcommand:
-        run()
+        # `run` with its defaults. It's given its own (empty) command line, as `sys.argv` holds the group's options,
+        # and parsed like one so its option callbacks still apply.
+        with run.make_context('run', [], parent=ctx) as run_ctx:
+            run.invoke(run_ctx)
 
 
 @main.command()
@@ -960,7 +1407,7 @@ def main(ctx):
 @click.option('--watch-interval', default=os.getenv('DUMPHFDL_WATCH_INTERVAL', WATCH_INTERVAL))
 @click.option('--sdr-settle', default=int(os.getenv('DUMPHFDL_SDR_SETTLE', SDR_SETTLE_TIME)))
 @click.option('--log-path', default=os.getenv('DUMPHFDL_LOG_PATH', LOG_PATH))
-@click.option('--acars-hub', default=os.getenv('DUMPHFDL_ACARS_HUB'))
+@click.option('--acars-hub', callback=parse_acars_hub, default=os.getenv('DUMPHFDL_ACARS_HUB'))
 @click.option('--statsd', help='(see dumphfdl)', default=os.getenv('DUMPHFDL_STATSD'))
 @click.option('--soapysdr', help='(see dumphfdl)', default=os.getenv('DUMPHFDL_SOAPYSDR'))
 @click.option('--antenna', help='(see dumphfdl)', default=os.getenv('DUMPHFDL_ANTENNA'))
@@ -978,7 +1425,6 @@ def run(core_ids, fringe_ids, skip_fill, max_samples, ignore_ranges, prefer, gs_
         **dumphfdl_opts
     ):
     ground_station_cache = GroundStationCache(gs_cache)
-    sample_rates = sorted(int(x) for x in sample_rates.split(',') if x)
 
     listener = HFDLListener(ground_station_cache, sample_rates, **dumphfdl_opts)
     listener.statsd_server = statsd
@@ -1001,15 +1447,36 @@ def run(core_ids, fringe_ids, skip_fill, max_samples, ignore_ranges, prefer, gs_
     watcher.set_ignore_ranges(ignore_ranges)
     watcher.set_prefer(prefer)
 
+    async def serve():
+        # SIGINT and SIGTERM both stop the watcher, and dumphfdl with it.
+        loop = asyncio.get_running_loop()
+        shutdown = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, shutdown.set)
+        watching = asyncio.create_task(watcher.run())
+        stopping = asyncio.create_task(shutdown.wait())
+        try:
+            done, _ = await asyncio.wait((watching, stopping), return_when=asyncio.FIRST_COMPLETED)
+            if watching in done:
+                watching.result()  # the watcher only stops on errors, which are passed on.
+            logger.info('shutting down')
+        finally:
+            watching.cancel()
+            stopping.cancel()
+            listener.stop()
+            await listener.wait_closed()
+
+    if uvloop:
+        logger.debug('using uvloop')
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     try:
-        loop.run_until_complete(watcher.run())
-    except asyncio.CancelledError:
-        listener.kill()
+        asyncio.run(serve())
     except KeyboardInterrupt:
-        listener.kill()
-    except:
-        listener.kill()
-        raise
+        # interrupted before the signal handlers were installed.
+        listener.stop()
+    finally:
+        # writes are rate-limited while running, so flush anything outstanding.
+        ground_station_cache.save(force=True)
 
 
 @main.command()
@@ -1021,19 +1488,13 @@ def scan(
         core_ids, fringe_ids, skip_fill, max_samples, ignore_ranges, prefer, gs_cache, sample_rates,
         core, named, experiments
     ):
-    global FRINGE_STATIONS, FILL_OTHER_STATIONS, EXPERIMENTAL
-    EXPERIMENTAL = experiments
-    if core:
-        FRINGE_STATIONS = []
-    FILL_OTHER_STATIONS = not (named or core)
-
     ground_station_cache = GroundStationCache(gs_cache)
-    sample_rates = sorted(int(x) for x in sample_rates.split(',') if x)
 
     watcher = GroundStationWatcher(ground_station_cache)
     watcher.core_ids = split_stations(core_ids)
-    watcher.fringe_ids = split_stations(fringe_ids)
-    watcher.skip_fill = skip_fill
+    watcher.fringe_ids = [] if core else split_stations(fringe_ids)
+    watcher.skip_fill = skip_fill or named or core
+    watcher.experimental = experiments
     watcher.max_sample_size = max_samples
     watcher.sample_rates = sample_rates
     watcher.set_ignore_ranges(ignore_ranges)
@@ -1042,9 +1503,9 @@ def scan(
     logger.debug(f'core ids = {core_ids} / {watcher.core_ids}')
 
     freqs = watcher.refresh()
-    bandwidth = int(bandwidth_for_interval(freqs))
-    samples = int(bandwidth / FILTER_FACTOR)
-    sample_rate = sample_rate_for(samples, watcher.sample_rates)
+    ground_station_cache.save(force=True)
+    bandwidth = bandwidth_for_interval(freqs)
+    sample_rate = sample_rate_for(samples_for_interval(freqs), watcher.sample_rates)
     watcher.experimental_pools()
     logger.info(f"Best Frequencies: {freqs}")
     logger.info(f"Required bandwidth: {bandwidth}kHz")
@@ -1052,5 +1513,4 @@ def scan(
 
 
 if __name__ == "__main__":
-    loop = asyncio.get_event_loop()
     main()
@@ -7,15 +7,27 @@ A simple-ish script (that may no longer be working) to empirically scan HFDL fre
 This can be used to pick CORE and FRINGE frequencies for `dumphfdl`, or for other amusing purposes.
 """
 
-from collections import defaultdict, namedtuple
+from collections import Counter, defaultdict, namedtuple
 
+import bisect
+import concurrent.futures
+import functools
 import json
+import os
 import pathlib
 import subprocess
+import sys
 import tempfile
 import time
 
 import click   # apt install python3-click
+try:
+    import orjson   # optional, for faster log parsing. `pip install orjson`
+except ImportError:
+    orjson = None
+
+# orjson's errors subclass json.JSONDecodeError, so error handling is the same either way.
+json_loads = orjson.loads if orjson else json.loads
 
 # The path to where the logs are stored. These are used later to compile some simple stats.
 LOG_LOCATION = './'
@@ -24,6 +36,9 @@ LOG_LOCATION = './'
 STATION_NAME = None  # 'XX-XYZA0-HFDL'
 # set this if you want to push stats to a statsd server during empirical scan
 STATSD_SERVER = None  #'stats.lan:8125'
+# The file in LOG_LOCATION where each log's binned stats are kept between `stats`/`snr` runs, so logs that haven't
+# changed since aren't parsed again. Set to None to always parse everything.
+STATS_CACHE_NAME = '.hfdl-stats-cache.json'
 
 # bands are named for their MHz frequency
 bands = {
@@ -68,7 +83,7 @@ def populate_band_groups():
         for band in range(start, end+1):
             freqs.extend(bands.get(band, []))
         band_groups[name] = freqs
-        band_groups.update({ str(band): freqs for band, freqs in bands.items()})
+    band_groups.update({ str(band): freqs for band, freqs in bands.items()})
     return band_groups
 
 band_groups = populate_band_groups()
@@ -89,6 +104,8 @@ sample_rates = [
     1000000, 2000000, 2048000, 3000000, 4000000, 5000000, 6000000, 7000000, 8000000, 9000000
 ]
 bandpasses = { WINDOW_PASS * rate: rate for rate in sample_rates }
+# sorted, so the smallest sufficient bandpass can be bisected for.
+bandpass_sizes = sorted(bandpasses)
 
 MAXIMUM_SAMPLE_SIZE = max(sample_rates)
 
@@ -98,14 +115,16 @@ def get_sample_rate(freqs):
     for the RSPdx, it can use any arbitrary size between 2M and 10M, and this is used as a fallback. It tries to pick
     the smallest sample size without hitting the bandpass filter shoulders.
     """
-    min_freq = min(freqs)
-    max_freq = max(freqs)
+    return sample_rate_for_range(min(freqs), max(freqs))
+
+
+@functools.lru_cache(maxsize=None)
+def sample_rate_for_range(min_freq, max_freq):
+    # only the edges of a group matter, so `rates` and `command` share results for the same groups.
     range = max_freq - min_freq
     bandpass_needed = range * 1000 / WINDOW_PASS
-    found = sys.maxsize
-    for b in bandpasses:
-        if b > bandpass_needed:
-            found = min(b, found)
+    ix = bisect.bisect_right(bandpass_sizes, bandpass_needed)
+    found = bandpass_sizes[ix] if ix < len(bandpass_sizes) else sys.maxsize
     result = bandpasses.get(found, found)
     if result > 2_000_000:
         result = int(bandpass_needed)
@@ -160,16 +179,17 @@ def command(band_name, log_file=None):
 
 
 def run_command(cmd, timeout=None):
-    if timeout:
-        cmd = ['timeout', f'{timeout}s'] + cmd
-    try:
-        result = subprocess.run(cmd)  # , capture_output=True)
-        # print(result.stdout)
-        # print(result.stderr)
-        return result
-    except KeyboardInterrupt:
-        subprocess.run(['pkill', 'dumphfdl'])
-        raise
+    # stopped with SIGTERM when time is up (as coreutils' `timeout` would), so dumphfdl can flush its logs. Only this
+    # process is stopped on ^C, rather than every dumphfdl running.
+    with subprocess.Popen(cmd) as process:
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            pass
+        finally:
+            if process.poll() is None:
+                process.terminate()
+    return subprocess.CompletedProcess(cmd, process.returncode)
 
 
 def test_band(band_name, tempdirname):
@@ -181,27 +201,32 @@ def test_band_groups():
     results = {}
     with tempfile.TemporaryDirectory() as tempdirname:
         for name in test_groups:
+            # give the SDR a moment after the last dumphfdl let go of it.
             time.sleep(2)
             log_file = f'{tempdirname}/hfdl-{name}.log'
+            # dumphfdl has exited (and closed its log) by the time this returns, so the log can be read straight away.
             test_band(name, log_file)
-            time.sleep(2)
-            counts = defaultdict(lambda: 0)
+            counts = Counter()
             try:
-                log_text = pathlib.Path(log_file).read_text()
-                for line in log_text.split('\n'):
-                    try:
-                        packet = json.loads(line)
-                    except:
-                        continue
-                    hfdl_packet = packet['hfdl']
-                    app_packet = hfdl_packet.get('lpdu', {}) or hfdl_packet.get('spdu', {})
-                    source = app_packet.get('src', {}).get('type', None)
-                    if source == 'Ground station':
-                        counts['uplink'] += 1
-                    elif source == 'Aircraft':
-                        counts['downlink'] += 1
-                    else:
-                        counts['unknown'] += 1
+                # streamed a line at a time, so only one packet is held in memory.
+                with open(log_file, 'rb') as log:
+                    for line in log:
+                        # every packet is wrapped in "hfdl", so anything else can be skipped without parsing it.
+                        if b'"hfdl"' not in line:
+                            continue
+                        try:
+                            packet = json_loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        hfdl_packet = packet['hfdl']
+                        app_packet = hfdl_packet.get('lpdu', {}) or hfdl_packet.get('spdu', {})
+                        source = app_packet.get('src', {}).get('type', None)
+                        if source == 'Ground station':
+                            counts['uplink'] += 1
+                        elif source == 'Aircraft':
+                            counts['downlink'] += 1
+                        else:
+                            counts['unknown'] += 1
             except FileNotFoundError:
                 pass
             results[name] = counts
@@ -209,59 +234,112 @@ def test_band_groups():
 
 
 def best_band(results):
-    maxima = None
-    maxima_name = None
-    for name, counts in results.items():
-        if (
-            not maxima or
-            counts['downlink'] > maxima['downlink'] or
-            ( counts['downlink'] == maxima['downlink'] and (
-                counts['uplink'] > maxima['uplink'] or
-                ( counts['uplink'] == maxima['uplink'] and counts['unknown'] > maxima['unknown'])
-            ))):
-            maxima_name = name
-            maxima = counts
-    if maxima_name:
-        return maxima_name
-    else:
+    if not results:
         raise ValueError("No valid bands found")
+    # most downlinks, then uplinks, then unknowns. Ties go to the first group tested.
+    return max(results, key=lambda name: (
+        results[name]['downlink'], results[name]['uplink'], results[name]['unknown']
+    ))
 
 
-def read_files(file_list):
+def read_file(fn):
     """
-    Bin packet counts from a recent period (day? week?) by frequency band and hour of day.
+    Bin packet counts from a single log file by frequency band and hour of day.
     hour of day bin: ((hfdl.t.sec // 3600) % 24) [unix_ts]
     frequency_bin: bands_reverse[hfdl.freq // 1000]
     """
     hours = defaultdict(dict)
-    for fn in file_list:
-        fp = pathlib.Path(fn)
-        lines = fp.read_text().split('\n')
-        packets = []
-        for line in lines:
-            if line:
-                try:
-                    packets.append(json.loads(line))
-                except json.decoder.JSONDecodeError:
-                    print(f"junk packet: {line}")
-        for packet in packets:
+    fp = pathlib.Path(fn)
+    # logs can be large, so they're streamed a line at a time rather than read (and split) whole.
+    with fp.open('rb') as f:
+        for line in f:
+            line = line.rstrip(b'\n')
+            if not line:
+                continue
+            # every packet is wrapped in "hfdl", so anything else is junk without needing to be parsed.
+            try:
+                packet = json_loads(line) if b'"hfdl"' in line else None
+            except json.decoder.JSONDecodeError:
+                packet = None
+            if packet is None:
+                print(f"junk packet: {line.decode(errors='replace')}")
+                continue
             utc_sec = int(packet['hfdl']['t']['sec'])
             freq = packet['hfdl']['freq'] // 1000
             sig = packet['hfdl']['sig_level']
             noise = packet['hfdl']['noise_level']
             hour_bin = (utc_sec // 3600) % 24
             band = bands_reverse[freq]
-            band_stats = hours[hour_bin].setdefault(band, {'count': 0, 'snr': 0})
-            avg_snr = band_stats['snr'] * band_stats['count']
+            # SNRs are summed, and only averaged when shown.
+            band_stats = hours[hour_bin].setdefault(band, {'count': 0, 'snr_sum': 0})
             band_stats['count'] += 1
-            band_stats['snr'] = (avg_snr + sig - noise) / band_stats['count']
+            band_stats['snr_sum'] += sig - noise
+    return hours
+
+
+def load_stats_cache(cache_file):
+    # {resolved log path: [size, mtime_ns, [[hour, band, count, snr_sum], ...]]}
+    try:
+        cache = json_loads(cache_file.read_bytes())
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_stats_cache(cache_file, cache):
+    # written alongside and then swapped in, so an interrupted run can't leave a truncated cache behind.
+    partial = cache_file.with_name(cache_file.name + '.tmp')
+    partial.write_text(json.dumps(cache))
+    os.replace(partial, cache_file)
+
+
+def read_files(file_list, cache_file=None):
+    """
+    Bin packet counts from a recent period (day? week?) by frequency band and hour of day. See `read_file`.
+    With a `cache_file`, logs that haven't changed since the last run are taken from it rather than parsed again.
+    """
+    cache = load_stats_cache(cache_file) if cache_file else {}
+    paths = [str(pathlib.Path(fn).resolve()) for fn in file_list]
+    entries = {}
+    for path in paths:
+        stat = os.stat(path)
+        entry = cache.get(path)
+        # anything that isn't a whole entry for this version of the log (say, one edited by hand) is just read again.
+        version = [stat.st_size, stat.st_mtime_ns]
+        if isinstance(entry, list) and len(entry) == 3 and entry[:2] == version and isinstance(entry[2], list):
+            entries[path] = entry
+        else:
+            entries[path] = [*version, None]
+    # each file is binned on its own, so they're read in parallel and their bins combined.
+    stale = [path for path, entry in entries.items() if entry[2] is None]
+    if len(stale) > 1:
+        with concurrent.futures.ProcessPoolExecutor() as executor:
+            read = list(executor.map(read_file, stale))
+    else:
+        # usually just today's log, which isn't worth starting worker processes for.
+        read = [read_file(path) for path in stale]
+    for path, file_hours in zip(stale, read):
+        entries[path][2] = [
+            [hour_bin, band, file_stats['count'], file_stats['snr_sum']]
+            for hour_bin, file_bands in file_hours.items()
+            for band, file_stats in file_bands.items()
+        ]
+    hours = defaultdict(dict)
+    for path in paths:
+        for hour_bin, band, count, snr_sum in entries[path][2]:
+            band_stats = hours[hour_bin].setdefault(band, {'count': 0, 'snr_sum': 0})
+            band_stats['count'] += count
+            band_stats['snr_sum'] += snr_sum
+    if cache_file:
+        # only the logs read this time are kept, so rotated-out logs drop out of the cache.
+        save_stats_cache(cache_file, entries)
     return hours
 
 
 def compile_stats():
     home = pathlib.Path(LOG_LOCATION)
     files = home.glob('hfdl*json*.log')
-    return read_files(files)
+    return read_files(files, home / STATS_CACHE_NAME if STATS_CACHE_NAME else None)
 
 
 def print_stats(stats):
@@ -278,7 +356,8 @@ def print_snr(stats):
     for hour in sorted(list(stats.keys())):
         hour_stats = [hour]
         for band in bands:
-            hour_stats.append(stats[hour].get(band, {}).get('snr', 0))
+            band_stats = stats[hour].get(band)
+            hour_stats.append(band_stats['snr_sum'] / band_stats['count'] if band_stats else 0)
         print(f"{hour_stats[0]}\t" + "\t".join(f"{x:0.2f}" if x else '' for x in hour_stats[1:]))
 
 
@@ -10,16 +10,27 @@ direction on each frequency from/to each ground station. Output is JSON only.
 import json
 import pathlib
 
-from collections import defaultdict
+from collections import Counter
 
-data_by_freq = {}
-data_by_station = {}
+try:
+    import orjson   # optional, for faster log parsing. `pip install orjson`
+except ImportError:
+    orjson = None
+
+# orjson's errors subclass json.JSONDecodeError, so error handling is the same either way.
+json_loads = orjson.loads if orjson else json.loads
+
+# (frequency, station, 'src' or 'dst') -> packets. Pivoted into the by-frequency and by-station views by `summary`.
+packet_counts = Counter()
 
 def add_data(file_path):
-    with open(file_path, 'r') as f:
+    with open(file_path, 'rb') as f:
         for line in f:
+            # every packet is wrapped in "hfdl", so anything else (blank lines included) is skipped without parsing.
+            if b'"hfdl"' not in line:
+                continue
             try:
-                data = json.loads(line)
+                data = json_loads(line)
             except json.JSONDecodeError as e:
                 print(e)
                 continue
@@ -39,16 +50,17 @@ def add_data(file_path):
                 print(pdu)
 
             if bin_name:
-                bin = (data_by_freq
-                    .setdefault(freq, {})
-                    .setdefault(station, defaultdict(lambda: 0))
-                )
-                bin[bin_name] += 1
-                bin = (data_by_station
-                    .setdefault(station, {})
-                    .setdefault(freq, defaultdict(lambda: 0))
-                )
-                bin[bin_name] += 1
+                packet_counts[freq, station, bin_name] += 1
+
+
+def summary():
+    data_by_freq = {}
+    data_by_station = {}
+    for (freq, station, bin_name), count in packet_counts.items():
+        data_by_freq.setdefault(freq, {}).setdefault(station, {})[bin_name] = count
+        data_by_station.setdefault(station, {}).setdefault(freq, {})[bin_name] = count
+    return {"by_freq": data_by_freq, "by_station": data_by_station}
+
 
 if __name__ == '__main__':
     import sys
@@ -56,5 +68,12 @@ if __name__ == '__main__':
         file_path = pathlib.Path(f)
         add_data(file_path)
 
-    data = {"by_freq": data_by_freq, "by_station": data_by_station}
-    print(json.dumps(data, indent=4))
+    data = summary()
+    if orjson:
+        # frequencies are integer keys, which orjson only writes with OPT_NON_STR_KEYS (as strings, like json does).
+        # Anything printed so far is flushed first, so it stays ahead of the bytes written underneath it.
+        sys.stdout.flush()
+        sys.stdout.buffer.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS) + b'\n')
+    else:
+        # indented like orjson (which can only indent by two spaces), so the report looks the same either way.
+        print(json.dumps(data, indent=2, ensure_ascii=False))
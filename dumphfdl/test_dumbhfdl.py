@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# test_dumbhfdl.py - checks for dumbhfdl's command line. Run with `python -m unittest` (or pytest) from this directory.
+# copyright 2024 Kuupa Ork <kuupaork+github@ork.rodeo>
+# see LICENSE for terms of use (TL;DR: BSD 3-clause)
+
+import logging
+import os
+import pathlib
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from click.testing import CliRunner
+
+import dumbhfdl
+
+HERE = pathlib.Path(__file__).parent
+
+
+class MainGroupTest(unittest.TestCase):
+    def setUp(self):
+        root = logging.getLogger()
+        self.addCleanup(root.setLevel, root.level)
+
+    def invoke(self, args):
+        # the listener itself isn't started, only what `run` would have been called with is recorded.
+        with mock.patch.object(dumbhfdl.run, 'callback') as run:
+            result = CliRunner().invoke(dumbhfdl.main, args, catch_exceptions=False)
+        return result, run
+
+    def test_no_subcommand_runs_with_defaults(self):
+        result, run = self.invoke(['--log-level', 'info'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        run.assert_called_once()
+        # option callbacks still apply to the defaults.
+        self.assertEqual(run.call_args.kwargs['sample_rates'], dumbhfdl.parse_sample_rates(None, None, ''))
+        self.assertEqual(logging.getLogger().level, logging.INFO)
+
+    def test_subcommand_after_log_level(self):
+        result, run = self.invoke(['--log-level', 'WARNING', 'run', '--sample-rates', '912000,456000'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(run.call_args.kwargs['sample_rates'], (456000, 912000))
+        self.assertEqual(logging.getLogger().level, logging.WARNING)
+
+    def test_unknown_log_level_is_reported(self):
+        result, run = self.invoke(['--log-level', 'bogus'])
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn('--log-level', result.output)
+        run.assert_not_called()
+
+    def test_unknown_env_log_level_does_not_break_import(self):
+        env = dict(os.environ, DUMPHFDL_LOG_LEVEL='bogus')
+        imported = subprocess.run(
+            [sys.executable, '-c', 'import dumbhfdl'], cwd=HERE, env=env, capture_output=True, text=True
+        )
+        self.assertEqual(imported.returncode, 0, imported.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()